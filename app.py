@@ -5,19 +5,36 @@ Complete single-file application with GPIO control, web dashboard, and monitorin
 """
 
 import os
+import re
+import atexit
+import queue
 import json
 import sqlite3
+import struct
 import hashlib
+import hmac
+import math
+import mimetypes
 import threading
 import time
 from datetime import datetime, timedelta
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for, session, send_file
+from flask import Flask, Response, request, make_response, send_from_directory, stream_with_context, jsonify, redirect, url_for, session, g, has_request_context
 from flask_cors import CORS
+from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+from itertools import chain
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 import csv
 import io
 import zipfile
 
+# Response compression is optional; without it responses are sent uncompressed
+try:
+    from flask_compress import Compress
+    COMPRESSION_AVAILABLE = True
+except ImportError:
+    COMPRESSION_AVAILABLE = False
+
 # GPIO setup with fallback for non-Pi systems
 try:
     from gpiozero import LED, Button
@@ -35,6 +52,13 @@ app.secret_key = 'your-secret-key-change-this-in-production'
 # Enable CORS for React frontend
 CORS(app, supports_credentials=True, origins=["http://localhost:5173", "http://127.0.0.1:5173"])
 
+# Compress HTML, JSON and the vendored CSS/JS for clients that accept it
+if COMPRESSION_AVAILABLE:
+    app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json', 'text/css',
+                                        'application/javascript', 'text/javascript']
+    app.config['COMPRESS_LEVEL'] = 5
+    Compress(app)
+
 # Hardware configuration
 DOOR_SENSOR_PIN = 17
 GREEN_LED_PIN = 25
@@ -42,10 +66,41 @@ RED_LED_PIN = 27
 WHITE_LED_PIN = 23
 SWITCH_PIN = 24
 
+# Role permissions, built once rather than as list literals on every request
+CONTROL_ROLES = frozenset({'Admin', 'Manager'})
+REPORT_ROLES = frozenset({'Admin', 'Manager', 'Supervisor'})
+
+# Storage configuration
+DATABASE_PATH = 'door_monitor.db'
+STATE_PATH = 'system_state.bin'
+LEGACY_STATE_PATH = 'system_state.json'  # read once to migrate, never written
+# timer_duration, timer_active, alarm_triggered, door_open, timer start (epoch seconds, 0 if unset)
+STATE_STRUCT = struct.Struct('<I???d')
+REPORT_BATCH_SIZE = 10000  # rows fetched and written per CSV chunk
+
+class ReportDialect(csv.Dialect):
+    """Minimal-quoting CSV with bare newline row endings"""
+    delimiter = ','
+    quotechar = '"'
+    doublequote = True
+    quoting = csv.QUOTE_MINIMAL
+    lineterminator = '\n'
+
+csv.register_dialect('report', ReportDialect)
+
+# Fixed SQL text (one variant per combination of date filters), so each pooled
+# connection prepares each once and reuses the statement
+REPORT_SQL = '''
+    SELECT e.timestamp, e.event_type, e.description, e.user_id, e.severity
+    FROM events e
+    {where}
+    ORDER BY e.timestamp DESC
+'''
+
 # Initialize GPIO components
 if GPIO_AVAILABLE:
     try:
-        door_sensor = Button(DOOR_SENSOR_PIN, pull_up=False)  # Fixed: pull_up=False for normally closed door sensor
+        door_sensor = Button(DOOR_SENSOR_PIN, pull_up=False, bounce_time=0.05)  # Fixed: pull_up=False for normally closed door sensor; 50 ms debounce
         green_led = LED(GREEN_LED_PIN)
         red_led = LED(RED_LED_PIN)
         white_led = LED(WHITE_LED_PIN)
@@ -62,58 +117,84 @@ class SystemState:
         self.alarm_triggered = False
         self.timer_start_time = None
         self.timer_duration = 30  # seconds
-        self.blink_thread = None
-        self.stop_blink = False
+        self.expiry_timer = None  # threading.Timer that raises the alarm
+        self.lock = threading.RLock()  # guards timer, alarm and reset transitions; expire_timer re-enters it
         self.last_scroll_position = 0
+        self.last_state_bytes = None  # last payload written, to skip unchanged rewrites
+        self.version = 0  # bumped on every state change; keys the /api/status ETag
         self.load_state()
     
     def save_state(self):
-        """Save persistent state to JSON file"""
-        state_data = {
-            'timer_duration': self.timer_duration,
-            'timer_active': self.timer_active,
-            'timer_start_time': self.timer_start_time.isoformat() if self.timer_start_time else None,
-            'alarm_triggered': self.alarm_triggered,
-            'door_open': self.door_open
-        }
+        """Save persistent state to the binary state file"""
+        started = self.timer_start_time.timestamp() if self.timer_start_time else 0.0
+        payload = STATE_STRUCT.pack(self.timer_duration, self.timer_active, self.alarm_triggered,
+                                    self.door_open, started)
+        if payload == self.last_state_bytes:
+            return
+        self.version += 1
+        publish_status()
         try:
-            with open('system_state.json', 'w') as f:
-                json.dump(state_data, f, indent=2)
+            # Write aside and rename so a power cut never leaves a half-written state file
+            with open(STATE_PATH + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(STATE_PATH + '.tmp', STATE_PATH)
+            self.last_state_bytes = payload
         except Exception as e:
             print(f"Error saving state: {e}")
     
     def load_state(self):
-        """Load persistent state from JSON file"""
+        """Load persistent state, falling back to the JSON file older versions wrote"""
         try:
-            if os.path.exists('system_state.json'):
-                with open('system_state.json', 'r') as f:
+            if os.path.exists(STATE_PATH):
+                with open(STATE_PATH, 'rb') as f:
+                    payload = f.read()
+                duration, timer_active, alarm_triggered, door_open, started = STATE_STRUCT.unpack(payload)
+                self.last_state_bytes = payload
+                start_time = datetime.fromtimestamp(started) if started else None
+            elif os.path.exists(LEGACY_STATE_PATH):
+                with open(LEGACY_STATE_PATH, 'r') as f:
                     state_data = json.load(f)
-                    self.timer_duration = state_data.get('timer_duration', 30)
-                    self.timer_active = state_data.get('timer_active', False)
-                    self.alarm_triggered = state_data.get('alarm_triggered', False)
-                    self.door_open = state_data.get('door_open', False)
-                    
-                    # Restore timer if it was active
-                    if state_data.get('timer_start_time'):
-                        self.timer_start_time = datetime.fromisoformat(state_data['timer_start_time'])
-                        # Check if timer should have expired
-                        if self.timer_active:
-                            elapsed = (datetime.now() - self.timer_start_time).total_seconds()
-                            if elapsed >= self.timer_duration:
-                                self.trigger_alarm()
+                duration = state_data.get('timer_duration', 30)
+                timer_active = state_data.get('timer_active', False)
+                alarm_triggered = state_data.get('alarm_triggered', False)
+                door_open = state_data.get('door_open', False)
+                started = state_data.get('timer_start_time')
+                start_time = datetime.fromisoformat(started) if started else None
+            else:
+                return
+            
+            self.timer_duration = duration
+            self.timer_active = timer_active
+            self.alarm_triggered = alarm_triggered
+            self.door_open = door_open
+            
+            # Restore timer if it was active
+            if start_time:
+                self.timer_start_time = start_time
+                # Check if timer should have expired
+                if self.timer_active:
+                    elapsed = (datetime.now() - self.timer_start_time).total_seconds()
+                    if elapsed >= self.timer_duration:
+                        self.trigger_alarm()
         except Exception as e:
             print(f"Error loading state: {e}")
 
 # Initialize system state
+# Versions restart with the process, so tag status ETags with the start time
+STATUS_ETAG_PREFIX = f'status-{int(time.time())}'
 system_state = SystemState()
 
 # Database setup
 def init_db():
     """Initialize SQLite database with proper error handling"""
     try:
-        conn = sqlite3.connect('door_monitor.db')
+        conn = connect_db()
         cursor = conn.cursor()
         
+        # WAL lets readers run alongside the event writer and, with NORMAL sync,
+        # avoids an fsync per commit; journal_mode persists in the database file
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -144,12 +225,18 @@ def init_db():
             )
         ''')
         
-        # Create default admin user
-        admin_hash = hashlib.sha256('admin123'.encode()).hexdigest()
-        cursor.execute('''
-            INSERT OR IGNORE INTO users (username, password_hash, role, email, department)
-            VALUES (?, ?, ?, ?, ?)
-        ''', ('admin', admin_hash, 'Admin', 'admin@doormonitor.local', 'IT'))
+        # Newest-first listings and report date ranges walk this index backwards instead of
+        # sorting; the older DESC index left id ties to a temp B-tree sort, so replace it
+        cursor.execute('DROP INDEX IF EXISTS idx_events_ts')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_ts_id ON events(timestamp, id)')
+        
+        # Create default admin user; a read first keeps warm starts free of the
+        # scrypt hash and the write lock
+        if cursor.execute("SELECT 1 FROM users WHERE username = 'admin'").fetchone() is None:
+            cursor.execute('''
+                INSERT INTO users (username, password_hash, role, email, department)
+                VALUES (?, ?, ?, ?, ?)
+            ''', ('admin', hash_password('admin123'), 'Admin', 'admin@doormonitor.local', 'IT'))
         
         conn.commit()
         conn.close()
@@ -158,6 +245,101 @@ def init_db():
         print(f"Database initialization error: {e}")
         log_event('SYSTEM', f'Database initialization failed: {str(e)}', severity='ERROR')
 
+def connect_db(**kwargs):
+    """Open a SQLite connection with the per-connection tuning applied"""
+    conn = sqlite3.connect(DATABASE_PATH, **kwargs)
+    # These settings do not persist in the file, so every connection sets them
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache
+    return conn
+
+# Request threads (and gevent greenlets) are created per request, so a thread-local
+# connection would die with each one; instead a few long-lived connections are
+# handed out per request and returned in teardown, keeping SQLite's page and
+# statement caches warm and the PRAGMAs to one run per connection
+DB_POOL_SIZE = 4  # idle connections kept; a busier moment opens extras and closes them after
+db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def open_db():
+    """Open a long-lived connection that may move between threads"""
+    db = connect_db(cached_statements=256, check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    return db
+
+def get_db():
+    """Return this request's SQLite connection, borrowing one from the pool on first use"""
+    if 'db' not in g:
+        try:
+            g.db = db_pool.get_nowait()
+        except queue.Empty:
+            g.db = open_db()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Roll back anything the request left uncommitted and return its connection"""
+    db = g.pop('db', None)
+    if db is None:
+        return
+    if db.in_transaction:
+        db.rollback()
+    try:
+        db_pool.put_nowait(db)
+    except queue.Full:
+        db.close()
+
+VENDOR_DIR = os.path.join(app.static_folder, 'vendor')
+
+def find_brotli_assets():
+    """Vendored files shipped with a brotli-compressed .br copy beside them"""
+    assets = set()
+    for root, _, files in os.walk(VENDOR_DIR):
+        for name in files:
+            if name.endswith('.br'):
+                assets.add(os.path.relpath(os.path.join(root, name[:-3]), VENDOR_DIR).replace(os.sep, '/'))
+    return frozenset(assets)
+
+# Scanned once so serving an asset never probes the filesystem for a .br sibling
+BROTLI_ASSETS = find_brotli_assets()
+
+@app.route('/static/vendor/<path:filename>')
+def vendor_asset(filename):
+    """Serve a vendored asset, precompressed with brotli when the client accepts it"""
+    if filename in BROTLI_ASSETS and request.accept_encodings['br']:
+        response = send_from_directory(VENDOR_DIR, filename + '.br',
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        response.headers['Content-Encoding'] = 'br'
+    else:
+        response = send_from_directory(VENDOR_DIR, filename)
+    response.vary.add('Accept-Encoding')
+    # Let browsers keep vendored Bootstrap/Font Awesome files without revalidating
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# Flask-Compress tags a compressed body's ETag "<etag>:<algorithm>", and browsers
+# revalidate with that tagged value
+COMPRESSED_ETAG_SUFFIX = re.compile(r':(?:gzip|deflate|br|zstd)$')
+
+def etag_matches(etag):
+    """Whether If-None-Match names etag, with or without a compression suffix"""
+    if_none_match = request.if_none_match
+    return if_none_match.star_tag or any(
+        COMPRESSED_ETAG_SUFFIX.sub('', tag) == etag
+        for tag in if_none_match.as_set(include_weak=True)
+    )
+
+# Fixed rejection bodies, serialized once; a fresh Response per call since after_request hooks edit headers
+INSUFFICIENT_PERMISSIONS = b'{"message":"Insufficient permissions","success":false}\n'
+ADMIN_ACCESS_REQUIRED = b'{"message":"Admin access required","success":false}\n'
+INVALID_CREDENTIALS = b'{"message":"Invalid credentials","success":false}\n'
+METHOD_NOT_ALLOWED = b'{"message":"Method not allowed","success":false}\n'
+
+def json_reject(body, status=200):
+    """Wrap a preformatted JSON rejection body in a response"""
+    return Response(body, status=status, mimetype='application/json')
+
 # Authentication decorator
 def login_required(f):
     @wraps(f)
@@ -173,73 +355,278 @@ def admin_required(f):
         if 'user_id' not in session:
             return redirect(url_for('login'))
         if session.get('role') != 'Admin':
-            return jsonify({'success': False, 'message': 'Admin access required'})
+            return json_reject(ADMIN_ACCESS_REQUIRED)
         return f(*args, **kwargs)
     return decorated_function
 
+def role_required(roles):
+    """Reject the request before the view runs unless the session role is in roles"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if session.get('role') not in roles:
+                return json_reject(INSUFFICIENT_PERMISSIONS)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+# Password hashing
+# scrypt with N=2**14 keeps verification well under a second on a Pi while
+# still salting and stretching; only login ever verifies, API calls rely on the session
+PASSWORD_HASH_METHOD = 'scrypt:16384:8:1'
+
+def hash_password(password):
+    """Hash a password for storage"""
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+
+def is_legacy_hash(stored_hash):
+    """Unsalted SHA-256 hex digests predate the scrypt hashes"""
+    return '$' not in stored_hash
+
+def verify_password(stored_hash, password):
+    """Check a password against a stored scrypt or legacy SHA-256 hash"""
+    if is_legacy_hash(stored_hash):
+        # Compare raw 32-byte digests rather than hex-encoding the computed one
+        try:
+            stored_digest = bytes.fromhex(stored_hash)
+        except ValueError:
+            return False
+        return hmac.compare_digest(stored_digest, hashlib.sha256(password.encode()).digest())
+    return check_password_hash(stored_hash, password)
+
+# Checked against when a login names an unknown user, so that costs the same scrypt
+# as a wrong password and response times do not reveal which usernames exist
+DUMMY_PASSWORD_HASH = hash_password(os.urandom(16).hex())
+
+# Unfiltered first-page /api/events payloads keyed by limit (1-100, so the cache stays
+# bounded). Steady-state polling re-reads the same rows, so they are served from here
+# until the next event is logged; event_type is client-chosen and never cached.
+events_cache = {}
+events_cache_generation = 0
+
+def invalidate_events_cache():
+    """Drop cached event pages after a new event is written"""
+    global events_cache_generation
+    events_cache_generation += 1
+    events_cache.clear()
+
+# Live updates: each /api/stream client owns a queue, and state saves and event
+# writes push to every queue, so browsers hear about changes instead of polling
+stream_clients = set()
+stream_clients_lock = threading.Lock()
+STREAM_HEARTBEAT = 30  # seconds between keep-alive comments on an idle stream
+
+def publish(kind, data):
+    """Send one server-sent event to every connected /api/stream client"""
+    message = f'event: {kind}\ndata: {json.dumps(data)}\n\n'
+    with stream_clients_lock:
+        for client in stream_clients:
+            client.put(message)
+
+def remaining_time():
+    """Seconds left on the security timer, 0 when it is not running"""
+    s = system_state
+    if s.timer_active and s.timer_start_time:
+        elapsed = (datetime.now() - s.timer_start_time).total_seconds()
+        return max(0, s.timer_duration - elapsed)
+    return 0
+
+def status_payload():
+    """Current system status as served by /api/status and /api/stream"""
+    s = system_state
+    return {
+        'success': True,
+        'door_open': s.door_open,
+        'timer_active': s.timer_active,
+        'alarm_triggered': s.alarm_triggered,
+        'remaining_time': remaining_time(),
+        'timer_duration': s.timer_duration,
+        'gpio_available': GPIO_AVAILABLE,
+        'timestamp': datetime.now().isoformat()
+    }
+
+# Long-polling /api/status requests wait on this until the state changes
+status_changed = threading.Condition()
+STATUS_MAX_WAIT = 30  # seconds a long-poll may be held
+
+def publish_status():
+    """Push the current status to stream clients and wake long-polls"""
+    with status_changed:
+        status_changed.notify_all()
+    if stream_clients:
+        publish('status', status_payload())
+
+def wait_for_change(unchanged, wait):
+    """Hold a long-poll until unchanged() is false or wait seconds (capped) pass"""
+    deadline = time.monotonic() + min(wait, STATUS_MAX_WAIT)
+    with status_changed:
+        while unchanged():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            # Tick each second while the timer counts down so the remaining time moves
+            status_changed.wait(min(left, 1) if system_state.timer_active else left)
+
+def long_poll_etag():
+    """The ETag a long-poll passed as ?etag=, minus quotes and any compression suffix"""
+    return COMPRESSED_ETAG_SUFFIX.sub('', request.args.get('etag', '').strip('"'))
+
+def status_etag():
+    """ETag for the current status payload"""
+    # The payload only changes with a state save or, while counting down, each
+    # displayed second; versions restart with the process, hence the prefix
+    return f'{STATUS_ETAG_PREFIX}-{system_state.version}-{math.ceil(remaining_time())}'
+
 # Event logging with enhanced features
+# Callers only enqueue; one writer thread commits whatever has queued up in a
+# single transaction, so bursts share a commit and requests never wait on the disk
+event_queue = queue.Queue()
+EVENT_BATCH_SIZE = 200  # most events written per transaction
+EVENT_ROWS_PER_INSERT = 50  # rows per multi-row INSERT statement
+# The insert for each row count, built once so the SQL text is identical every call
+# and stays in the connection's statement cache (cached_statements covers all 50)
+EVENT_INSERT_SQL = [None] + [
+    'INSERT INTO events (timestamp, event_type, description, user_id, severity, additional_data) VALUES '
+    + ', '.join(['(?, ?, ?, ?, ?, ?)'] * rows)
+    for rows in range(1, EVENT_ROWS_PER_INSERT + 1)
+]
+
 def log_event(event_type, description, user_id=None, severity='INFO', additional_data=None):
     """Enhanced event logging with severity levels and additional data"""
-    try:
-        conn = sqlite3.connect('door_monitor.db')
-        cursor = conn.cursor()
-        
-        if user_id is None and 'user_id' in session:
-            user_id = session['user_id']
-            
-        cursor.execute('''
-            INSERT INTO events (event_type, description, user_id, severity, additional_data)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (event_type, description, user_id, severity, additional_data))
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Error logging event: {e}")
+    if user_id is None and has_request_context():
+        user_id = session.get('user_id')
+    # Stamped at enqueue, in the UTC format CURRENT_TIMESTAMP uses, so ordering matches call order
+    timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    event_queue.put((timestamp, event_type, description, user_id, severity, additional_data))
+
+# Running COUNT(*) of events, loaded on first use and advanced by the writer so
+# /api/events never scans the table for its unfiltered total
+events_total = None
+events_total_lock = threading.Lock()
+# Newest event id, tracked the same way; it keys the /api/events ETag
+events_latest_id = None
+
+def count_events(conn):
+    """Total number of logged events"""
+    global events_total
+    with events_total_lock:
+        if events_total is None:
+            events_total = conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+        return events_total
+
+def latest_event_id(conn):
+    """Id of the most recently logged event, 0 when there are none"""
+    global events_latest_id
+    with events_total_lock:
+        if events_latest_id is None:
+            events_latest_id = conn.execute('SELECT MAX(id) FROM events').fetchone()[0] or 0
+        return events_latest_id
+
+def write_events(conn, batch):
+    """Insert a batch of queued events in one transaction"""
+    global events_total, events_latest_id
+    # Held across the commit so a concurrent first count cannot include the batch twice
+    with events_total_lock:
+        with conn:
+            # Multi-row VALUES binds and steps once per chunk rather than once per event;
+            # chunks stay well under SQLite's 999 bound-parameter limit
+            for i in range(0, len(batch), EVENT_ROWS_PER_INSERT):
+                chunk = batch[i:i + EVENT_ROWS_PER_INSERT]
+                cursor = conn.execute(EVENT_INSERT_SQL[len(chunk)], list(chain.from_iterable(chunk)))
+        if events_total is not None:
+            events_total += len(batch)
+        events_latest_id = cursor.lastrowid
+    invalidate_events_cache()
+    publish('event', {'id': cursor.lastrowid})
+    # Wake /api/snapshot long-polls waiting for new events
+    with status_changed:
+        status_changed.notify_all()
+
+def event_writer():
+    """Drain the event queue into the database"""
+    conn = open_db()  # the writer's own connection, kept for the life of the process
+    while True:
+        batch = [event_queue.get()]
+        while len(batch) < EVENT_BATCH_SIZE:
+            try:
+                batch.append(event_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            try:
+                write_events(conn, batch)
+            except Exception:
+                app.logger.exception('Event batch of %d failed; retrying one at a time', len(batch))
+                # Retry row by row so one bad event costs only itself, not the whole batch
+                for event in batch:
+                    try:
+                        write_events(conn, [event])
+                    except Exception:
+                        app.logger.exception('Dropped event %r', event[:3])
+        finally:
+            for _ in batch:
+                event_queue.task_done()
+
+def flush_events():
+    """Block until every queued event has been written"""
+    event_queue.join()
+
+threading.Thread(target=event_writer, daemon=True).start()
+atexit.register(flush_events)
 
 def start_timer():
     """Start countdown timer with proper state management"""
-    if not system_state.timer_active and not system_state.alarm_triggered:
+    # Everything happens under the lock, so concurrent door callbacks start one timer
+    # and a reset cannot slip in between the state change and the blink/timer setup
+    with system_state.lock:
+        if system_state.timer_active or system_state.alarm_triggered:
+            return
         system_state.timer_active = True
         system_state.timer_start_time = datetime.now()
         system_state.save_state()
         
-        log_event('TIMER', f'Timer started - Duration: {system_state.timer_duration}s', 
-                 severity='WARNING')
-        
-        # Start blinking red LED
-        start_blink_red_led()
+        # gpiozero blinks from its own background thread; red_led.off() stops it
+        if GPIO_AVAILABLE:
+            red_led.blink(on_time=0.5, off_time=0.5)
         
-        # Start timer countdown in separate thread
-        timer_thread = threading.Thread(target=countdown_timer)
-        timer_thread.daemon = True
-        timer_thread.start()
+        # One timer fires at expiry instead of a thread sleeping through the window;
+        # reset_system cancels it
+        system_state.expiry_timer = threading.Timer(system_state.timer_duration, expire_timer)
+        system_state.expiry_timer.daemon = True
+        system_state.expiry_timer.start()
+    
+    log_event('TIMER', f'Timer started - Duration: {system_state.timer_duration}s', 
+             severity='WARNING')
 
-def countdown_timer():
-    """Countdown timer logic"""
+def expire_timer():
+    """Raise the alarm when the countdown runs out"""
     try:
-        time.sleep(system_state.timer_duration)
-        if system_state.timer_active and not system_state.alarm_triggered:
-            trigger_alarm()
+        with system_state.lock:
+            # A timer cancelled just as it fired may still run; only the current one counts
+            if system_state.expiry_timer is not threading.current_thread():
+                return
+            system_state.expiry_timer = None
+            if system_state.timer_active and not system_state.alarm_triggered:
+                trigger_alarm()
     except Exception as e:
         log_event('SYSTEM', f'Timer countdown error: {str(e)}', severity='ERROR')
 
 def trigger_alarm():
     """Trigger alarm with comprehensive logging"""
     try:
-        system_state.alarm_triggered = True
-        system_state.timer_active = False
-        system_state.stop_blink = True
-        system_state.save_state()
-        
-        if GPIO_AVAILABLE:
-            red_led.off()
-            white_led.on()
-            try:
-                pygame.mixer.music.load('alarm.wav')
-                pygame.mixer.music.play(-1)
-            except:
-                pass
+        with system_state.lock:
+            system_state.alarm_triggered = True
+            system_state.timer_active = False
+            system_state.save_state()
+            
+            if GPIO_AVAILABLE:
+                red_led.off()
+                white_led.on()
+                try:
+                    pygame.mixer.music.load('alarm.wav')
+                    pygame.mixer.music.play(-1)
+                except:
+                    pass
         
         log_event('ALARM', 'Security alarm triggered - Unauthorized access detected', 
                  severity='CRITICAL', 
@@ -253,44 +640,23 @@ def trigger_alarm():
     except Exception as e:
         log_event('SYSTEM', f'Alarm trigger error: {str(e)}', severity='ERROR')
 
-def start_blink_red_led():
-    """Start blinking red LED in separate thread"""
-    if system_state.blink_thread and system_state.blink_thread.is_alive():
-        return
-        
-    system_state.stop_blink = False
-    system_state.blink_thread = threading.Thread(target=blink_red_led)
-    system_state.blink_thread.daemon = True
-    system_state.blink_thread.start()
-
-def blink_red_led():
-    """Blink red LED while timer is active"""
-    try:
-        while system_state.timer_active and not system_state.stop_blink:
-            if GPIO_AVAILABLE:
-                red_led.on()
-                time.sleep(0.5)
-                red_led.off()
-                time.sleep(0.5)
-            else:
-                time.sleep(1)
-    except Exception as e:
-        log_event('SYSTEM', f'LED blink error: {str(e)}', severity='ERROR')
-
 def reset_system():
     """Reset system state with proper cleanup"""
     try:
-        system_state.timer_active = False
-        system_state.alarm_triggered = False
-        system_state.stop_blink = True
-        system_state.timer_start_time = None
-        system_state.save_state()
-        
-        if GPIO_AVAILABLE:
-            red_led.off()
-            white_led.off()
-            green_led.on()
-            pygame.mixer.music.stop()
+        with system_state.lock:
+            if system_state.expiry_timer:
+                system_state.expiry_timer.cancel()
+                system_state.expiry_timer = None
+            system_state.timer_active = False
+            system_state.alarm_triggered = False
+            system_state.timer_start_time = None
+            system_state.save_state()
+            
+            if GPIO_AVAILABLE:
+                red_led.off()
+                white_led.off()
+                green_led.on()
+                pygame.mixer.music.stop()
         
         log_event('SYSTEM', 'System manually reset', severity='INFO')
     except Exception as e:
@@ -327,7 +693,21 @@ def monitor_door():
 @app.route('/')
 @login_required
 def dashboard():
-    return render_template_string(DASHBOARD_TEMPLATE)
+    # The page only varies by template and user, so repeat loads can skip rendering
+    etag = hashlib.blake2b(
+        f"{DASHBOARD_DIGEST}|{session.get('username')}|{session.get('role')}".encode(),
+        digest_size=16
+    ).hexdigest()
+    if etag_matches(etag):
+        response = make_response('', 304)
+    else:
+        # Stream the render so the browser can start on <head> while the body is generated
+        stream = DASHBOARD_TMPL.stream(session=session)
+        stream.enable_buffering(5)
+        response = Response(stream_with_context(stream), mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -335,37 +715,36 @@ def login():
         try:
             username = request.form['username']
             password = request.form['password']
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
             
-            conn = sqlite3.connect('door_monitor.db')
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, role, username FROM users WHERE username = ? AND password_hash = ?',
-                         (username, password_hash))
-            user = cursor.fetchone()
-            conn.close()
+            conn = get_db()
+            user = conn.execute('SELECT id, role, username, password_hash FROM users WHERE username = ?',
+                                (username,)).fetchone()
             
-            if user:
+            password_ok = verify_password(user[3] if user else DUMMY_PASSWORD_HASH, password)
+            if user and password_ok:
                 session['user_id'] = user[0]
                 session['role'] = user[1]
                 session['username'] = user[2]
                 
-                # Update last login
-                conn = sqlite3.connect('door_monitor.db')
-                cursor = conn.cursor()
-                cursor.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?', (user[0],))
-                conn.commit()
-                conn.close()
+                # Update last login, and upgrade a legacy hash, in one transaction
+                with conn:
+                    if is_legacy_hash(user[3]):
+                        # Now that the plaintext is known to be correct
+                        conn.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP, password_hash = ? WHERE id = ?',
+                                     (hash_password(password), user[0]))
+                    else:
+                        conn.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?', (user[0],))
                 
                 log_event('AUTH', f'User login successful', user_id=user[0], severity='INFO')
                 return jsonify({'success': True, 'message': 'Login successful'})
             else:
                 log_event('AUTH', f'Failed login attempt for username: {username}', severity='WARNING')
-                return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+                return json_reject(INVALID_CREDENTIALS, 401)
         except Exception as e:
             log_event('SYSTEM', f'Login error: {str(e)}', severity='ERROR')
             return jsonify({'success': False, 'message': 'Login system error'}), 500
     
-    return jsonify({'success': False, 'message': 'Method not allowed'}), 405
+    return json_reject(METHOD_NOT_ALLOWED, 405)
 
 @app.route('/logout')
 def logout():
@@ -381,81 +760,194 @@ def logout():
 def api_status():
     """Get system status with scroll position preservation"""
     try:
-        remaining_time = 0
-        if system_state.timer_active and system_state.timer_start_time:
-            elapsed = (datetime.now() - system_state.timer_start_time).total_seconds()
-            remaining_time = max(0, system_state.timer_duration - elapsed)
+        # Long-poll: with ?wait=N&etag=<last ETag>, hold the request until the status
+        # changes or N seconds pass
+        client_etag = long_poll_etag()
+        wait_for_change(lambda: client_etag == status_etag(), request.args.get('wait', 0, type=float))
+        etag = status_etag()
         
-        return jsonify({
-            'success': True,
-            'door_open': system_state.door_open,
-            'timer_active': system_state.timer_active,
-            'alarm_triggered': system_state.alarm_triggered,
-            'remaining_time': remaining_time,
-            'timer_duration': system_state.timer_duration,
-            'gpio_available': GPIO_AVAILABLE,
-            'timestamp': datetime.now().isoformat()
-        })
+        # Unchanged conditional polls get a 304 without encoding anything
+        if etag_matches(etag):
+            response = make_response('', 304)
+        else:
+            response = jsonify(status_payload())
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         log_event('SYSTEM', f'Status API error: {str(e)}', severity='ERROR')
         return jsonify({'success': False, 'error': str(e)})
 
+# Event row columns, aliased to the JSON keys so each Row converts directly
+EVENT_COLUMNS_SQL = '''e.id AS id, CAST(strftime('%s', e.timestamp) AS INTEGER) AS timestamp,
+                   e.event_type AS event_type, e.description AS description,
+                   COALESCE(u.username, 'System') AS username, e.severity AS severity'''
+
+@app.route('/api/stream')
+@login_required
+def api_stream():
+    """Stream status changes and new-event notices as server-sent events"""
+    client = queue.Queue()
+    with stream_clients_lock:
+        stream_clients.add(client)
+    
+    def generate():
+        try:
+            yield f'event: status\ndata: {json.dumps(status_payload())}\n\n'
+            while True:
+                # While the countdown runs, tick once a second so the remaining time moves
+                ticking = system_state.timer_active
+                try:
+                    yield client.get(timeout=1 if ticking else STREAM_HEARTBEAT)
+                except queue.Empty:
+                    if ticking:
+                        yield f'event: status\ndata: {json.dumps(status_payload())}\n\n'
+                    else:
+                        yield ': keep-alive\n\n'
+        finally:
+            with stream_clients_lock:
+                stream_clients.discard(client)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/snapshot')
+@login_required
+def api_snapshot():
+    """Get status and any events newer than ?since= in one round-trip"""
+    try:
+        per_page = min(max(request.args.get('limit', 25, type=int), 1), 100)
+        since = request.args.get('since', type=int)
+        conn = get_db()
+        
+        # Long-poll like /api/status, but a new event past ?since= also ends the wait
+        client_etag = long_poll_etag()
+        wait_for_change(
+            lambda: client_etag == status_etag() and (since is None or latest_event_id(conn) <= since),
+            request.args.get('wait', 0, type=float)
+        )
+        etag = status_etag()
+        new_events = []
+        if since is not None and latest_event_id(conn) > since:
+            new_events = [dict(row) for row in conn.execute(f'''
+                SELECT {EVENT_COLUMNS_SQL}
+                FROM events e
+                LEFT JOIN users u ON e.user_id = u.id
+                WHERE e.id > ?
+                ORDER BY e.id DESC
+                LIMIT ?
+            ''', (since, per_page))]
+        
+        response = jsonify({'success': True, 'status': status_payload(), 'new_events': new_events})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    except Exception as e:
+        log_event('SYSTEM', f'Snapshot API error: {str(e)}', severity='ERROR')
+        return jsonify({'success': False, 'error': str(e)})
+
+def events_response(payload, etag):
+    """JSON events page tagged so the browser revalidates it with If-None-Match"""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @app.route('/api/events')
 @login_required
 def api_events():
-    """Get events with pagination and filtering"""
+    """Get events with keyset pagination and filtering"""
     try:
-        page = int(request.args.get('page', 1))
-        per_page = 25
-        offset = (page - 1) * per_page
+        per_page = min(max(request.args.get('limit', 25, type=int), 1), 100)
+        before_ts = request.args.get('before_ts', type=int)
+        before_id = request.args.get('before_id', type=int)
+        event_type = request.args.get('event_type')
+        since = request.args.get('since', type=int)
+        
+        # Seek past the previous page instead of OFFSET so deep pages stay O(limit);
+        # id breaks ties between events logged within the same second
+        where = []
+        params = []
+        if event_type:
+            where.append('e.event_type = ?')
+            params.append(event_type)
+        if before_ts is not None and before_id is not None:
+            # Timestamps travel as epoch seconds; convert the bound back, not every row
+            where.append("(e.timestamp, e.id) < (datetime(?, 'unixepoch'), ?)")
+            params.extend([before_ts, before_id])
+        if since is not None:
+            # Only events newer than the client's latest; ids grow with log order, so
+            # this is a rowid range scan rather than a walk of the timestamp index
+            where.append('e.id > ?')
+            params.append(since)
+            order_sql = 'e.id DESC'
+        else:
+            order_sql = 'e.timestamp DESC, e.id DESC'
+        where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
+        
+        conn = get_db()
+        # Every page is a function of the events logged so far, so the newest id
+        # validates any of them; read it first so a concurrent write only ever
+        # makes the tag older than the body
+        etag = f'events-{latest_event_id(conn)}'
+        if etag_matches(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        cache_key = per_page if not event_type and before_id is None and since is None else None
+        cached = events_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return events_response(cached, etag)
+        generation = events_cache_generation
         
-        conn = sqlite3.connect('door_monitor.db')
         cursor = conn.cursor()
         
         # Get total count
-        cursor.execute('SELECT COUNT(*) FROM events')
-        total_events = cursor.fetchone()[0]
+        if event_type:
+            cursor.execute('SELECT COUNT(*) FROM events WHERE event_type = ?', (event_type,))
+            total_events = cursor.fetchone()[0]
+        else:
+            total_events = count_events(conn)
         
         # Get events with user info
-        cursor.execute('''
-            SELECT e.timestamp, e.event_type, e.description, u.username, e.severity
+        cursor.execute(f'''
+            SELECT {EVENT_COLUMNS_SQL}
             FROM events e
             LEFT JOIN users u ON e.user_id = u.id
-            ORDER BY e.timestamp DESC
-            LIMIT ? OFFSET ?
-        ''', (per_page, offset))
+            {where_sql}
+            ORDER BY {order_sql}
+            LIMIT ?
+        ''', (*params, per_page))
         
-        events = []
-        for row in cursor.fetchall():
-            events.append({
-                'timestamp': row[0],
-                'event_type': row[1],
-                'description': row[2],
-                'username': row[3] or 'System',
-                'severity': row[4]
-            })
+        # Columns are aliased to the JSON keys, so each Row converts directly
+        events = [dict(row) for row in cursor]
         
-        conn.close()
+        next_cursor = None
+        if len(events) == per_page:
+            next_cursor = {'before_ts': events[-1]['timestamp'], 'before_id': events[-1]['id']}
         
-        return jsonify({
+        payload = {
             'success': True,
             'events': events,
             'total_events': total_events,
-            'page': page,
-            'total_pages': (total_events + per_page - 1) // per_page
-        })
+            'next_cursor': next_cursor
+        }
+        # Skip caching if an event was logged while this page was being read
+        if cache_key and generation == events_cache_generation:
+            events_cache[cache_key] = payload
+        return events_response(payload, etag)
     except Exception as e:
         log_event('SYSTEM', f'Events API error: {str(e)}', severity='ERROR')
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/reset', methods=['POST'])
 @login_required
+@role_required(CONTROL_ROLES)
 def api_reset():
     """Reset system with proper authorization"""
     try:
-        if session.get('role') not in ['Admin', 'Manager']:
-            return jsonify({'success': False, 'message': 'Insufficient permissions'})
-        
         reset_system()
         return jsonify({'success': True, 'message': 'System reset successfully'})
     except Exception as e:
@@ -464,12 +956,10 @@ def api_reset():
 
 @app.route('/api/update_timer', methods=['POST'])
 @login_required
+@role_required(CONTROL_ROLES)
 def api_update_timer():
     """Update timer duration with validation"""
     try:
-        if session.get('role') not in ['Admin', 'Manager']:
-            return jsonify({'success': False, 'message': 'Insufficient permissions'})
-        
         duration = int(request.json.get('duration', 30))
         if duration < 1 or duration > 86400:  # 1 second to 24 hours
             return jsonify({'success': False, 'message': 'Invalid timer duration'})
@@ -489,758 +979,110 @@ def api_update_timer():
 
 @app.route('/api/download_report')
 @login_required
+@role_required(REPORT_ROLES)
 def download_report():
     """Generate and download CSV report"""
     try:
-        if session.get('role') not in ['Admin', 'Manager', 'Supervisor']:
-            return jsonify({'success': False, 'message': 'Insufficient permissions'})
-        
-        conn = sqlite3.connect('door_monitor.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT e.timestamp, e.event_type, e.description, u.username, e.severity
-            FROM events e
-            LEFT JOIN users u ON e.user_id = u.id
-            ORDER BY e.timestamp DESC
-        ''')
-        
-        events = cursor.fetchall()
-        conn.close()
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Timestamp', 'Event Type', 'Description', 'User', 'Severity'])
-        
-        for event in events:
-            writer.writerow(event)
+        # Optional YYYY-MM-DD range, inclusive of date_to; bound so the SQL text stays cacheable
+        where = []
+        params = []
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        try:
+            if date_from:
+                where.append('e.timestamp >= ?')
+                params.append(datetime.strptime(date_from, '%Y-%m-%d').strftime('%Y-%m-%d'))
+            if date_to:
+                where.append('e.timestamp < ?')
+                params.append((datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d'))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Dates must be YYYY-MM-DD'})
+        where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
         
-        # Create file response
-        mem = io.BytesIO()
-        mem.write(output.getvalue().encode())
-        mem.seek(0)
+        conn = get_db()
+        # users is tiny and static next to events; a dict lookup per row replaces the join probe
+        usernames = dict(conn.execute('SELECT id, username FROM users').fetchall())
+        cursor = conn.execute(REPORT_SQL.format(where=where_sql), params)
+        user_id = session.get('user_id')
         
-        log_event('REPORT', 'Event report downloaded', severity='INFO')
+        # Stream rows off the cursor in batches so memory stays flat however large the
+        # log grows; one reused buffer takes each batch through the C csv writer
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, dialect='report')
+            writer.writerow(['Timestamp', 'Event Type', 'Description', 'User', 'Severity'])
+            try:
+                while True:
+                    rows = cursor.fetchmany(REPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    # Transpose and re-zip with C builtins so no Python frame runs per row
+                    stamps, types, descriptions, user_ids, severities = zip(*rows)
+                    writer.writerows(zip(stamps, types, descriptions, map(usernames.get, user_ids), severities))
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                if buffer.tell():
+                    yield buffer.getvalue()
+            finally:
+                # An abandoned download must not hand its open read back to the pool
+                cursor.close()
         
-        return send_file(
-            io.BytesIO(output.getvalue().encode()),
+        filename = time.strftime('door_monitor_report_%Y%m%d_%H%M%S.csv')
+        response = Response(
+            stream_with_context(generate()),
             mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'door_monitor_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
+        # Record the download once the body has gone out, keeping the insert off the first byte
+        response.call_on_close(lambda: log_event('REPORT', 'Event report downloaded', user_id=user_id, severity='INFO'))
+        return response
         
     except Exception as e:
         log_event('SYSTEM', f'Report download error: {str(e)}', severity='ERROR')
         return jsonify({'success': False, 'error': str(e)})
 
-# Enhanced HTML templates with scroll position preservation
-DASHBOARD_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Door Monitoring System</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-    <style>
-        :root {
-            --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            --success-gradient: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-            --warning-gradient: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
-            --danger-gradient: linear-gradient(135deg, #ff6b6b 0%, #ffa500 100%);
-        }
-
-        body {
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            min-height: 100vh;
-        }
-
-        .navbar {
-            background: var(--primary-gradient);
-            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-        }
-
-        .card {
-            border: none;
-            border-radius: 15px;
-            box-shadow: 0 8px 30px rgba(0,0,0,0.1);
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-            backdrop-filter: blur(10px);
-            background: rgba(255,255,255,0.9);
-        }
-
-        .card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 15px 40px rgba(0,0,0,0.15);
-        }
-
-        .status-card {
-            background: var(--success-gradient);
-            color: white;
-        }
-
-        .status-card.warning {
-            background: var(--warning-gradient);
-        }
-
-        .status-card.danger {
-            background: var(--danger-gradient);
-        }
-
-        .nav-pills .nav-link {
-            border-radius: 25px;
-            margin: 0 5px;
-            transition: all 0.3s ease;
-            border: 2px solid transparent;
-        }
-
-        .nav-pills .nav-link:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-        }
-
-        .nav-pills .nav-link.active {
-            background: var(--primary-gradient);
-            border-color: rgba(255,255,255,0.3);
-        }
-
-        .btn-custom {
-            border-radius: 25px;
-            padding: 10px 25px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            border: none;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-
-        .btn-primary-custom {
-            background: var(--primary-gradient);
-            color: white;
-        }
-
-        .btn-primary-custom:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 25px rgba(102, 126, 234, 0.4);
-        }
-
-        .event-item {
-            border-left: 4px solid #007bff;
-            transition: all 0.3s ease;
-        }
-
-        .event-item:hover {
-            background-color: rgba(0,123,255,0.05);
-            transform: translateX(5px);
-        }
-
-        .event-critical { border-left-color: #dc3545; }
-        .event-warning { border-left-color: #ffc107; }
-        .event-info { border-left-color: #17a2b8; }
-
-        .status-indicator {
-            width: 20px;
-            height: 20px;
-            border-radius: 50%;
-            display: inline-block;
-            animation: pulse 2s infinite;
-            margin-right: 10px;
-        }
-
-        .status-green { background-color: #28a745; }
-        .status-red { background-color: #dc3545; }
-        .status-white { background-color: #ffc107; }
+# Compile templates once at import; render_template_string re-parses the source on every call.
+# Loading by name lets the bytecode cache key on (name, source checksum) so compiled
+# templates survive process restarts.
+TEMPLATE_DIR = os.path.join(app.root_path, 'templates')
+TEMPLATE_CACHE_DIR = 'jinja_cache'
 
-        @keyframes pulse {
-            0% { opacity: 1; }
-            50% { opacity: 0.5; }
-            100% { opacity: 1; }
-        }
-
-        .stats-card {
-            background: linear-gradient(135deg, rgba(255,255,255,0.1), rgba(255,255,255,0.05));
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255,255,255,0.2);
-        }
+# Whitespace between tags is dead weight in every response; <pre>/<textarea> keep theirs
+INTER_TAG_WHITESPACE = re.compile(r'(<(?:pre|textarea)\b.*?</(?:pre|textarea)>)|>\s+(?=<)', re.S | re.I)
 
-        .notification-toast {
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            z-index: 9999;
-            max-width: 350px;
-            border-radius: 10px;
-            box-shadow: 0 8px 30px rgba(0,0,0,0.3);
-        }
+def minify_html(source):
+    """Collapse whitespace between tags once, before the template is compiled"""
+    return INTER_TAG_WHITESPACE.sub(lambda m: m.group(1) or '>', source)
 
-        .scroll-preserve {
-            overflow-y: auto;
-            max-height: 400px;
-        }
-
-        /* Prevent layout shift during updates */
-        .status-container {
-            min-height: 200px;
-        }
+class MinifyingLoader(FileSystemLoader):
+    """Template loader that minifies each source as it is read from disk"""
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        return minify_html(source), filename, uptodate
 
-        .events-container {
-            min-height: 300px;
-        }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark">
-        <div class="container">
-            <a class="navbar-brand fw-bold">
-                <i class="fas fa-shield-alt me-2"></i>
-                Door Security Monitor
-            </a>
-            <div class="navbar-nav ms-auto">
-                <span class="navbar-text me-3">
-                    <i class="fas fa-user-circle me-1"></i>
-                    Welcome, {{ session.username }} ({{ session.role }})
-                </span>
-                <a class="btn btn-outline-light btn-sm" href="/logout">
-                    <i class="fas fa-sign-out-alt me-1"></i>Logout
-                </a>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container mt-4">
-        <!-- Status Dashboard -->
-        <div class="row mb-4">
-            <div class="col-12">
-                <div class="card">
-                    <div class="card-body">
-                        <h5 class="card-title mb-4">
-                            <i class="fas fa-tachometer-alt me-2"></i>System Status
-                        </h5>
-                        <div class="row status-container" id="statusContainer">
-                            <div class="col-md-3 mb-3">
-                                <div class="card status-card" id="doorStatusCard">
-                                    <div class="card-body text-center">
-                                        <i class="fas fa-door-open fa-2x mb-2"></i>
-                                        <h6>Door Status</h6>
-                                        <span id="doorStatus">Loading...</span>
-                                    </div>
-                                </div>
-                            </div>
-                            <div class="col-md-3 mb-3">
-                                <div class="card status-card" id="timerStatusCard">
-                                    <div class="card-body text-center">
-                                        <i class="fas fa-clock fa-2x mb-2"></i>
-                                        <h6>Timer Status</h6>
-                                        <span id="timerStatus">Loading...</span>
-                                    </div>
-                                </div>
-                            </div>
-                            <div class="col-md-3 mb-3">
-                                <div class="card status-card" id="alarmStatusCard">
-                                    <div class="card-body text-center">
-                                        <i class="fas fa-bell fa-2x mb-2"></i>
-                                        <h6>Alarm Status</h6>
-                                        <span id="alarmStatus">Loading...</span>
-                                    </div>
-                                </div>
-                            </div>
-                            <div class="col-md-3 mb-3">
-                                <div class="card status-card">
-                                    <div class="card-body text-center">
-                                        <i class="fas fa-microchip fa-2x mb-2"></i>
-                                        <h6>GPIO Status</h6>
-                                        <span id="gpioStatus">Loading...</span>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                        <div class="text-center mt-3">
-                            <button class="btn btn-danger btn-custom" onclick="resetSystem()">
-                                <i class="fas fa-power-off me-2"></i>Reset System
-                            </button>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <!-- Navigation Tabs -->
-        <ul class="nav nav-pills mb-4 justify-content-center" id="mainTabs">
-            <li class="nav-item">
-                <a class="nav-link active" data-bs-toggle="pill" href="#events-tab">
-                    <i class="fas fa-list me-2"></i>Events
-                </a>
-            </li>
-            <li class="nav-item">
-                <a class="nav-link" data-bs-toggle="pill" href="#settings-tab">
-                    <i class="fas fa-cog me-2"></i>Settings
-                </a>
-            </li>
-            <li class="nav-item">
-                <a class="nav-link" data-bs-toggle="pill" href="#users-tab">
-                    <i class="fas fa-users me-2"></i>Users
-                </a>
-            </li>
-            <li class="nav-item">
-                <a class="nav-link" data-bs-toggle="pill" href="#reports-tab">
-                    <i class="fas fa-chart-bar me-2"></i>Reports
-                </a>
-            </li>
-            <li class="nav-item">
-                <a class="nav-link" data-bs-toggle="pill" href="#schedules-tab">
-                    <i class="fas fa-calendar me-2"></i>Schedules
-                </a>
-            </li>
-        </ul>
-
-        <!-- Tab Content -->
-        <div class="tab-content">
-            <!-- Events Tab -->
-            <div class="tab-pane fade show active" id="events-tab">
-                <div class="card">
-                    <div class="card-header">
-                        <h5 class="mb-0">
-                            <i class="fas fa-history me-2"></i>Recent Events
-                        </h5>
-                    </div>
-                    <div class="card-body">
-                        <div class="events-container scroll-preserve" id="eventsContainer">
-                            <div class="text-center">
-                                <div class="spinner-border text-primary" role="status">
-                                    <span class="visually-hidden">Loading events...</span>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Settings Tab -->
-            <div class="tab-pane fade" id="settings-tab">
-                <div class="card">
-                    <div class="card-header">
-                        <h5 class="mb-0">
-                            <i class="fas fa-sliders-h me-2"></i>System Settings
-                        </h5>
-                    </div>
-                    <div class="card-body">
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label for="timerDuration" class="form-label">Timer Duration (seconds)</label>
-                                    <input type="number" class="form-control" id="timerDuration" min="1" max="86400" value="30">
-                                </div>
-                                <button class="btn btn-primary btn-custom" onclick="updateTimer()">
-                                    <i class="fas fa-save me-2"></i>Update Timer
-                                </button>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="alert alert-info">
-                                    <h6><i class="fas fa-info-circle me-2"></i>Current Settings</h6>
-                                    <p class="mb-1">Timer Duration: <span id="currentTimer">30</span> seconds</p>
-                                    <p class="mb-0">Last Updated: <span id="lastUpdated">Never</span></p>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Users Tab -->
-            <div class="tab-pane fade" id="users-tab">
-                <div class="card">
-                    <div class="card-header">
-                        <h5 class="mb-0">
-                            <i class="fas fa-user-cog me-2"></i>User Management
-                        </h5>
-                    </div>
-                    <div class="card-body">
-                        <div class="alert alert-warning">
-                            <i class="fas fa-construction me-2"></i>
-                            User management interface coming soon. Contact administrator for user account changes.
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Reports Tab -->
-            <div class="tab-pane fade" id="reports-tab">
-                <div class="card">
-                    <div class="card-header">
-                        <h5 class="mb-0">
-                            <i class="fas fa-download me-2"></i>Generate Reports
-                        </h5>
-                    </div>
-                    <div class="card-body">
-                        <div class="row">
-                            <div class="col-md-6">
-                                <h6>Export Options</h6>
-                                <button class="btn btn-success btn-custom me-2" onclick="downloadReport()">
-                                    <i class="fas fa-file-csv me-2"></i>Download CSV Report
-                                </button>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="alert alert-info">
-                                    <h6><i class="fas fa-info-circle me-2"></i>Report Contents</h6>
-                                    <ul class="mb-0">
-                                        <li>All system events</li>
-                                        <li>User activities</li>
-                                        <li>Door status changes</li>
-                                        <li>Alarm triggers</li>
-                                    </ul>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Schedules Tab -->
-            <div class="tab-pane fade" id="schedules-tab">
-                <div class="card">
-                    <div class="card-header">
-                        <h5 class="mb-0">
-                            <i class="fas fa-clock me-2"></i>Access Schedules
-                        </h5>
-                    </div>
-                    <div class="card-body">
-                        <div class="alert alert-info">
-                            <i class="fas fa-calendar-check me-2"></i>
-                            Schedule management interface coming soon. Contact administrator for schedule changes.
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <!-- Notification Toast Container -->
-    <div id="toastContainer" class="position-fixed top-0 end-0 p-3" style="z-index: 9999;"></div>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        let lastScrollPosition = 0;
-        let updateInProgress = false;
-        
-        // Preserve scroll position during updates
-        function preserveScroll(callback) {
-            if (updateInProgress) return;
-            updateInProgress = true;
-            
-            const scrollableElements = document.querySelectorAll('.scroll-preserve');
-            const scrollPositions = {};
-            
-            scrollableElements.forEach((element, index) => {
-                scrollPositions[index] = element.scrollTop;
-            });
-            
-            callback();
-            
-            setTimeout(() => {
-                scrollableElements.forEach((element, index) => {
-                    if (scrollPositions[index] !== undefined) {
-                        element.scrollTop = scrollPositions[index];
-                    }
-                });
-                updateInProgress = false;
-            }, 100);
-        }
-        
-        // Show notification toast
-        function showNotification(message, type = 'info') {
-            const toastContainer = document.getElementById('toastContainer');
-            const toastId = 'toast-' + Date.now();
-            
-            const toastHtml = `
-                <div id="${toastId}" class="toast notification-toast" role="alert">
-                    <div class="toast-header bg-${type} text-white">
-                        <i class="fas fa-${type === 'success' ? 'check-circle' : type === 'danger' ? 'exclamation-triangle' : 'info-circle'} me-2"></i>
-                        <strong class="me-auto">System Alert</strong>
-                        <button type="button" class="btn-close btn-close-white" data-bs-dismiss="toast"></button>
-                    </div>
-                    <div class="toast-body">${message}</div>
-                </div>
-            `;
-            
-            toastContainer.insertAdjacentHTML('beforeend', toastHtml);
-            
-            const toast = new bootstrap.Toast(document.getElementById(toastId));
-            toast.show();
-            
-            // Auto remove after toast hides
-            document.getElementById(toastId).addEventListener('hidden.bs.toast', function() {
-                this.remove();
-            });
-        }
-        
-        // Update system status with scroll preservation
-        function updateStatus() {
-            preserveScroll(() => {
-                fetch('/api/status')
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            // Update door status
-                            const doorCard = document.getElementById('doorStatusCard');
-                            const doorStatus = document.getElementById('doorStatus');
-                            if (data.door_open) {
-                                doorCard.className = 'card status-card danger';
-                                doorStatus.innerHTML = '<i class="fas fa-door-open me-1"></i>Open';
-                            } else {
-                                doorCard.className = 'card status-card';
-                                doorStatus.innerHTML = '<i class="fas fa-door-closed me-1"></i>Closed';
-                            }
-                            
-                            // Update timer status
-                            const timerCard = document.getElementById('timerStatusCard');
-                            const timerStatus = document.getElementById('timerStatus');
-                            if (data.timer_active) {
-                                timerCard.className = 'card status-card warning';
-                                timerStatus.innerHTML = `<i class="fas fa-hourglass-half me-1"></i>${Math.ceil(data.remaining_time)}s`;
-                            } else {
-                                timerCard.className = 'card status-card';
-                                timerStatus.innerHTML = '<i class="fas fa-pause me-1"></i>Inactive';
-                            }
-                            
-                            // Update alarm status
-                            const alarmCard = document.getElementById('alarmStatusCard');
-                            const alarmStatus = document.getElementById('alarmStatus');
-                            if (data.alarm_triggered) {
-                                alarmCard.className = 'card status-card danger';
-                                alarmStatus.innerHTML = '<i class="fas fa-exclamation-triangle me-1"></i>TRIGGERED';
-                            } else {
-                                alarmCard.className = 'card status-card';
-                                alarmStatus.innerHTML = '<i class="fas fa-check me-1"></i>Normal';
-                            }
-                            
-                            // Update GPIO status
-                            document.getElementById('gpioStatus').innerHTML = data.gpio_available ? 
-                                '<i class="fas fa-check me-1"></i>Active' : 
-                                '<i class="fas fa-times me-1"></i>Simulation';
-                            
-                            // Update current timer display
-                            document.getElementById('currentTimer').textContent = data.timer_duration;
-                            document.getElementById('timerDuration').value = data.timer_duration;
-                        }
-                    })
-                    .catch(error => {
-                        console.error('Status update error:', error);
-                        if (!updateInProgress) {
-                            showNotification('Connection error - retrying...', 'danger');
-                        }
-                    });
-            });
-        }
-        
-        // Load events with scroll preservation
-        function loadEvents() {
-            preserveScroll(() => {
-                fetch('/api/events')
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            const eventsContainer = document.getElementById('eventsContainer');
-                            if (data.events.length === 0) {
-                                eventsContainer.innerHTML = '<div class="text-center text-muted">No events recorded yet.</div>';
-                                return;
-                            }
-                            
-                            let eventsHtml = '';
-                            data.events.forEach(event => {
-                                const severityClass = event.severity.toLowerCase();
-                                const iconClass = {
-                                    'critical': 'fas fa-exclamation-triangle text-danger',
-                                    'warning': 'fas fa-exclamation-circle text-warning',
-                                    'info': 'fas fa-info-circle text-info',
-                                    'error': 'fas fa-times-circle text-danger'
-                                }[severityClass] || 'fas fa-circle text-secondary';
-                                
-                                eventsHtml += `
-                                    <div class="event-item event-${severityClass} p-3 mb-2 bg-light rounded">
-                                        <div class="d-flex justify-content-between align-items-start">
-                                            <div class="flex-grow-1">
-                                                <div class="d-flex align-items-center mb-1">
-                                                    <i class="${iconClass} me-2"></i>
-                                                    <strong>${event.event_type}</strong>
-                                                    <span class="badge bg-${severityClass === 'critical' ? 'danger' : severityClass} ms-2">${event.severity}</span>
-                                                </div>
-                                                <p class="mb-1">${event.description}</p>
-                                                <small class="text-muted">
-                                                    <i class="fas fa-user me-1"></i>${event.username} • 
-                                                    <i class="fas fa-clock me-1"></i>${new Date(event.timestamp).toLocaleString()}
-                                                </small>
-                                            </div>
-                                        </div>
-                                    </div>
-                                `;
-                            });
-                            
-                            eventsContainer.innerHTML = eventsHtml;
-                        }
-                    })
-                    .catch(error => {
-                        console.error('Events loading error:', error);
-                        document.getElementById('eventsContainer').innerHTML = 
-                            '<div class="alert alert-danger">Error loading events. Please refresh the page.</div>';
-                    });
-            });
-        }
-        
-        // Reset system
-        function resetSystem() {
-            if (confirm('Are you sure you want to reset the system? This will clear all active alarms and timers.')) {
-                fetch('/api/reset', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' }
-                })
-                .then(response => response.json())
-                .then(data => {
-                    if (data.success) {
-                        showNotification('System reset successfully', 'success');
-                        updateStatus();
-                        loadEvents();
-                    } else {
-                        showNotification(data.message || 'Reset failed', 'danger');
-                    }
-                })
-                .catch(error => {
-                    console.error('Reset error:', error);
-                    showNotification('Reset failed - connection error', 'danger');
-                });
-            }
-        }
-        
-        // Update timer duration
-        function updateTimer() {
-            const duration = parseInt(document.getElementById('timerDuration').value);
-            if (duration < 1 || duration > 86400) {
-                showNotification('Timer duration must be between 1 second and 24 hours', 'danger');
-                return;
-            }
-            
-            fetch('/api/update_timer', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ duration: duration })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    showNotification('Timer updated successfully', 'success');
-                    document.getElementById('lastUpdated').textContent = new Date().toLocaleString();
-                    updateStatus();
-                    loadEvents();
-                } else {
-                    showNotification(data.message || 'Update failed', 'danger');
-                }
-            })
-            .catch(error => {
-                console.error('Timer update error:', error);
-                showNotification('Update failed - connection error', 'danger');
-            });
-        }
-        
-        // Download report
-        function downloadReport() {
-            showNotification('Generating report...', 'info');
-            window.location.href = '/api/download_report';
-        }
-        
-        // Initialize page
-        document.addEventListener('DOMContentLoaded', function() {
-            updateStatus();
-            loadEvents();
-            
-            // Set up regular updates with reduced frequency to prevent scroll issues
-            setInterval(updateStatus, 3000);  // Every 3 seconds instead of 1
-            setInterval(loadEvents, 10000);   // Every 10 seconds for events
-            
-            // Handle tab switching without page scroll
-            const tabLinks = document.querySelectorAll('[data-bs-toggle="pill"]');
-            tabLinks.forEach(link => {
-                link.addEventListener('shown.bs.tab', function(e) {
-                    // Prevent any automatic scrolling on tab change
-                    e.preventDefault();
-                    window.scrollTo(0, 0);
-                });
-            });
-        });
-    </script>
-</body>
-</html>
-'''
+def create_template_env():
+    """Build the Jinja environment with an on-disk bytecode cache when writable"""
+    bytecode_cache = None
+    try:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR, '__doormonitor_%s.cache')
+    except OSError as e:
+        print(f"Template cache unavailable: {e}")
+    env = Environment(
+        loader=MinifyingLoader(TEMPLATE_DIR),
+        autoescape=True,
+        auto_reload=False,
+        bytecode_cache=bytecode_cache
+    )
+    env.globals['url_for'] = url_for
+    return env
 
-LOGIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Door Monitor - Login</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-    <style>
-        body {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-        }
-        .login-card {
-            backdrop-filter: blur(10px);
-            background: rgba(255,255,255,0.1);
-            border: 1px solid rgba(255,255,255,0.2);
-            border-radius: 15px;
-            box-shadow: 0 8px 30px rgba(0,0,0,0.3);
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="row justify-content-center">
-            <div class="col-md-6">
-                <div class="card login-card">
-                    <div class="card-body p-5">
-                        <div class="text-center mb-4">
-                            <i class="fas fa-shield-alt fa-3x text-white mb-3"></i>
-                            <h2 class="text-white">Door Security Monitor</h2>
-                            <p class="text-white-50">Secure Access Required</p>
-                        </div>
-                        
-                        {% if error %}
-                        <div class="alert alert-danger">{{ error }}</div>
-                        {% endif %}
-                        
-                        <form method="POST">
-                            <div class="mb-3">
-                                <label for="username" class="form-label text-white">Username</label>
-                                <input type="text" class="form-control" id="username" name="username" required>
-                            </div>
-                            <div class="mb-3">
-                                <label for="password" class="form-label text-white">Password</label>
-                                <input type="password" class="form-control" id="password" name="password" required>
-                            </div>
-                            <button type="submit" class="btn btn-light w-100 fw-bold">
-                                <i class="fas fa-sign-in-alt me-2"></i>Login
-                            </button>
-                        </form>
-                        
-                        <div class="text-center mt-4">
-                            <small class="text-white-50">
-                                Default: admin / admin123
-                            </small>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-'''
+template_env = create_template_env()
+DASHBOARD_TMPL = template_env.get_template('dashboard.html')
+DASHBOARD_DIGEST = hashlib.blake2b(
+    template_env.loader.get_source(template_env, 'dashboard.html')[0].encode(), digest_size=16
+).hexdigest()
 
 if __name__ == '__main__':
     init_db()
@@ -1252,5 +1094,6 @@ if __name__ == '__main__':
     print(f"🌐 React Frontend: http://localhost:5173")
     print(f"🔧 GPIO Mode: {'Hardware' if GPIO_AVAILABLE else 'Simulation'}")
     print("🔐 Default Login: admin / admin123")
+    print("⚠️  Development server; in production run: gunicorn -c gunicorn_conf.py app:app")
     
     app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
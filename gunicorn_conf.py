@@ -0,0 +1,22 @@
+"""
+Gunicorn settings for running the door monitor in production:
+
+    gunicorn -c gunicorn_conf.py app:app
+
+gevent workers hold the /api/stream and long-poll connections as greenlets
+instead of one OS thread each.
+"""
+
+bind = '0.0.0.0:5000'
+worker_class = 'gevent'
+# GPIO pins, the alarm timer and stream subscribers live in the process, so
+# exactly one worker may own them
+workers = 1
+worker_connections = 1000
+
+def post_worker_init(worker):
+    """Prepare the database and start door monitoring once the worker is up"""
+    from app import init_db, monitor_door, GPIO_AVAILABLE
+    init_db()
+    if GPIO_AVAILABLE:
+        monitor_door()
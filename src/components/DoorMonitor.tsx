@@ -1,5 +1,5 @@
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -36,7 +36,7 @@ interface SystemStatus {
 }
 
 interface Event {
-  timestamp: string;
+  timestamp: number; // epoch seconds
   event_type: string;
   description: string;
   username: string;
@@ -48,6 +48,12 @@ interface User {
   password: string;
 }
 
+// One formatter for every event row; matches Date.prototype.toLocaleString() output
+const eventTimeFormat = new Intl.DateTimeFormat(undefined, {
+  year: 'numeric', month: 'numeric', day: 'numeric',
+  hour: 'numeric', minute: 'numeric', second: 'numeric'
+});
+
 const DoorMonitor = () => {
   const [isLoggedIn, setIsLoggedIn] = useState(false);
   const [user, setUser] = useState<User>({ username: '', password: '' });
@@ -74,6 +80,8 @@ const DoorMonitor = () => {
       return () => {
         clearInterval(statusInterval);
         clearInterval(eventsInterval);
+        statusController.current?.abort();
+        eventsController.current?.abort();
       };
     }
   }, [isLoggedIn]);
@@ -140,33 +148,44 @@ const DoorMonitor = () => {
     }
   };
 
+  // A newer poll aborts the one still in flight, so slow responses neither stack up
+  // nor overwrite fresher data
+  const statusController = useRef<AbortController | null>(null);
+  const eventsController = useRef<AbortController | null>(null);
+
   const fetchStatus = async () => {
+    statusController.current?.abort();
+    const controller = statusController.current = new AbortController();
     try {
       const response = await fetch(`${API_BASE}/api/status`, {
-        credentials: 'include'
+        credentials: 'include',
+        signal: controller.signal
       });
       if (response.ok) {
         const data = await response.json();
-        setStatus(data);
+        if (!controller.signal.aborted) setStatus(data);
       }
     } catch (error) {
-      console.error('Status fetch error:', error);
+      if ((error as Error).name !== 'AbortError') console.error('Status fetch error:', error);
     }
   };
 
   const fetchEvents = async () => {
+    eventsController.current?.abort();
+    const controller = eventsController.current = new AbortController();
     try {
       const response = await fetch(`${API_BASE}/api/events`, {
-        credentials: 'include'
+        credentials: 'include',
+        signal: controller.signal
       });
       if (response.ok) {
         const data = await response.json();
-        if (data.success) {
+        if (data.success && !controller.signal.aborted) {
           setEvents(data.events);
         }
       }
     } catch (error) {
-      console.error('Events fetch error:', error);
+      if ((error as Error).name !== 'AbortError') console.error('Events fetch error:', error);
     }
   };
 
@@ -420,7 +439,7 @@ const DoorMonitor = () => {
                             </div>
                             <p className="text-sm text-gray-600 mt-1">{event.description}</p>
                             <p className="text-xs text-gray-400 mt-1">
-                              {event.username} • {new Date(event.timestamp).toLocaleString()}
+                              {event.username} • {eventTimeFormat.format(event.timestamp * 1000)}
                             </p>
                           </div>
                         </div>